@@ -10,6 +10,10 @@ release_path = f"release/v{app_version}"
 app_name = "POS Printer Bridge"
 app_icon = "app.ico"
 
+# A --onefile executable unpacks itself into a temp folder on every launch;
+# `python build.py --onedir` builds a folder instead, which starts faster.
+bundle_mode = "--onedir" if "--onedir" in sys.argv[1:] else "--onefile"
+
 escpos_path = os.path.dirname(escpos.__file__)
 
 capabilities_file = os.path.join(escpos_path, "capabilities.json")
@@ -29,7 +33,7 @@ certs_data_arg = f"certs{sep}certs" if os.path.exists("certs") else ""
 
 PyInstaller.__main__.run([
     'main.py',
-    '--onefile',
+    bundle_mode,
     '--windowed',
     '--noconsole',
     f'--icon={app_icon}',
@@ -48,9 +52,13 @@ if certs_data_arg:
 else:
     print("Warning: certs folder not found, but PyInstaller will still try to include it")
 
+# The app opens certs/ and app.ico relative to its working directory, so they
+# go next to the executable: inside the app folder for --onedir builds.
+app_dir = os.path.join(release_path, app_name) if bundle_mode == "--onedir" else release_path
+
 # Copy certs folder to release directory
 certs_source = "certs"
-certs_dest = os.path.join(release_path, "certs")
+certs_dest = os.path.join(app_dir, "certs")
 
 if os.path.exists(certs_source):
     if os.path.exists(certs_dest):
@@ -62,7 +70,7 @@ else:
 
 # Copy icon file to release directory
 icon_source = app_icon
-icon_dest = os.path.join(release_path, app_icon)
+icon_dest = os.path.join(app_dir, app_icon)
 
 if os.path.exists(icon_source):
     shutil.copy2(icon_source, icon_dest)
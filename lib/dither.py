@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Optional, Tuple
+
+# numpy and Pillow are imported on first use so that importing DITHER_MODES
+# (e.g. for request validation) stays cheap.
+if TYPE_CHECKING:
+    from PIL import Image
+
+# 8x8 Bayer index matrix; thresholds sit in the middle of each of the 64 levels.
+_BAYER_8 = (
+    [0, 32, 8, 40, 2, 34, 10, 42],
+    [48, 16, 56, 24, 50, 18, 58, 26],
+    [12, 44, 4, 36, 14, 46, 6, 38],
+    [60, 28, 52, 20, 62, 30, 54, 22],
+    [3, 35, 11, 43, 1, 33, 9, 41],
+    [51, 19, 59, 27, 49, 17, 57, 25],
+    [15, 47, 7, 39, 13, 45, 5, 37],
+    [63, 31, 55, 23, 61, 29, 53, 21],
+)
+
+# Atkinson spreads 6/8 of the error: (dx, dy) offsets, 1/8 each.
+_ATKINSON_OFFSETS = ((1, 0), (2, 0), (-1, 1), (0, 1), (1, 1), (0, 2))
+
+
+def _bayer(img: Image.Image) -> Image.Image:
+    import numpy as np
+    from PIL import Image
+
+    gray = np.asarray(img, dtype=np.float32)
+    h, w = gray.shape
+    thresholds = (np.array(_BAYER_8, dtype=np.float32) + 0.5) * (255.0 / 64.0)
+    thresholds = np.tile(thresholds, (-(-h // 8), -(-w // 8)))[:h, :w]
+    return Image.fromarray(gray > thresholds)
+
+
+def _floyd_steinberg(img: Image.Image) -> Image.Image:
+    # Pillow's C implementation; error diffusion is inherently serial per pixel.
+    from PIL import Image
+
+    return img.convert("1", dither=Image.Dither.FLOYDSTEINBERG)
+
+
+def _atkinson(img: Image.Image) -> Image.Image:
+    """
+    Atkinson error diffusion, vectorized along anti-diagonals.
+
+    Every neighbour pixel (x, y) depends on has a smaller x + 2y, so all pixels
+    on one line x + 2y = t can be quantized together in a single array step.
+    In the flattened buffer such a line is a plain strided slice.
+    """
+    import numpy as np
+    from PIL import Image
+
+    gray = np.asarray(img, dtype=np.float32)
+    h, w = gray.shape
+    # One column of padding on the left, two on the right, two rows at the bottom.
+    stride = w + 3
+    buf = np.zeros((h + 2) * stride, dtype=np.float32)
+    buf.reshape(h + 2, stride)[:h, 1:w + 1] = gray
+    out = np.zeros_like(buf, dtype=bool)
+    offsets = [dx + dy * stride for dx, dy in _ATKINSON_OFFSETS]
+    # Moving one pixel along the line is (x - 2, y + 1).
+    step = stride - 2
+
+    for t in range(w + 2 * (h - 1)):
+        y_lo = max(0, (t - w) // 2 + 1)
+        y_hi = min(h - 1, t // 2)
+        start = y_lo * step + t + 1
+        line = slice(start, start + (y_hi - y_lo) * step + 1, step)
+        old = buf[line]
+        white = old >= 128
+        err = (old - white * np.float32(255.0)) * np.float32(0.125)
+        for off in offsets:
+            buf[line.start + off:line.stop + off:step] += err
+        out[line] = white
+
+    return Image.fromarray(out.reshape(h + 2, stride)[:h, 1:w + 1])
+
+
+DITHER_MODES: Dict[str, Callable[[Image.Image], Image.Image]] = {
+    "bayer": _bayer,
+    "floyd-steinberg": _floyd_steinberg,
+    "atkinson": _atkinson,
+}
+
+# Modes fast enough to dither a whole page (a few ms at 576 dots wide).
+# Atkinson takes ~50 ms per page and is only offered for embedded images.
+PAGE_DITHER_MODES = ("bayer", "floyd-steinberg")
+
+
+def dither_image(
+    img: Image.Image,
+    mode: str,
+    threshold: int = 130,
+    regions: Optional[Iterable[Tuple[int, int, int, int]]] = None,
+) -> Image.Image:
+    """
+    Convert a grayscale image to black/white (mode '1') with the given dither mode.
+
+    Args:
+        img:        grayscale ('L') image
+        mode:       one of DITHER_MODES
+        threshold:  hard threshold used outside `regions`
+        regions:    (left, upper, right, lower) boxes to dither; the rest of the
+                    image is hard-thresholded. None dithers the whole image.
+    """
+    ditherer = DITHER_MODES[mode]
+    if regions is None:
+        return ditherer(img)
+
+    out = img.point(lambda p: 0 if p < threshold else 255, mode="1")
+    for left, upper, right, lower in regions:
+        left, upper = max(0, left), max(0, upper)
+        right, lower = min(img.width, right), min(img.height, lower)
+        if right > left and lower > upper:
+            box = (left, upper, right, lower)
+            out.paste(ditherer(img.crop(box)), box)
+    return out
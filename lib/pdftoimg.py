@@ -1,12 +1,17 @@
+from __future__ import annotations
+
 import io
+import math
 import os
-from typing import List, Optional
-from PIL import Image, ImageFilter, ImageEnhance, ImageOps
-import fitz
+from typing import TYPE_CHECKING, List, Optional, Union
+
+# PyMuPDF and Pillow are imported on first use to keep bridge start-up fast.
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 def pdf_to_images(
-    pdf_path: str,
+    pdf_path: Union[str, bytes],
     zoom: float = 2.0,
     threshold: int = 130,
     printer_width: Optional[int] = None,
@@ -16,6 +21,8 @@ def pdf_to_images(
     contrast: float = 1.3,
     binarize: bool = True,
     max_pages: Optional[int] = None,
+    dither: Optional[str] = None,
+    dither_images_only: bool = True,
 ) -> List[Image.Image]:
     """
     Convert PDF pages to PIL Images prepared for thermal printing.
@@ -23,7 +30,7 @@ def pdf_to_images(
     Returns a list of PIL.Image instances (mode '1' if binarize=True, else 'L').
 
     Args:
-        pdf_path:         path to PDF
+        pdf_path:         path to PDF, or the PDF document itself as bytes
         zoom:             render scale (2.0 recommended for better halftone->b/w)
         threshold:        binarization threshold 0..255 (lower = darker)
         printer_width:    if set, resizes images to this width in pixels (preserve aspect)
@@ -33,8 +40,19 @@ def pdf_to_images(
         contrast:         multiplier for contrast enhancement
         binarize:         whether to convert to black/white (mode '1')
         max_pages:        stop after this many pages (None -> all)
+        dither:           binarize with a dither mode from lib.dither.DITHER_MODES
+                          ('bayer', 'floyd-steinberg', 'atkinson') instead of the threshold
+        dither_images_only: dither only the embedded images of the page and keep
+                          text and vector content hard-thresholded
     """
-    doc = fitz.open(pdf_path)
+    import fitz
+    from PIL import Image, ImageEnhance, ImageFilter
+    from lib.dither import dither_image
+
+    if isinstance(pdf_path, (bytes, bytearray)):
+        doc = fitz.open(stream=pdf_path, filetype="pdf")
+    else:
+        doc = fitz.open(pdf_path)
     images: List[Image.Image] = []
 
     for i, page in enumerate(doc):
@@ -45,6 +63,11 @@ def pdf_to_images(
         pix = page.get_pixmap(matrix=mat, alpha=False)
         img = Image.open(io.BytesIO(pix.tobytes(output="png"))).convert("L")  # grayscale
 
+        # Image placements in pixel coordinates, kept in sync with crop/resize below.
+        regions = None
+        if binarize and dither and dither_images_only:
+            regions = [tuple(fitz.Rect(info["bbox"]) * mat) for info in page.get_image_info()]
+
         if pad_pixels is None:
             pad_pixels = max(2, int((printer_width or img.width) * 0.01))
 
@@ -58,6 +81,8 @@ def pdf_to_images(
                 right = min(img.width, right + pad_pixels)
                 lower = min(img.height, lower + pad_pixels)
                 img = img.crop((left, upper, right, lower))
+                if regions:
+                    regions = [(x0 - left, y0 - upper, x1 - left, y1 - upper) for x0, y0, x1, y1 in regions]
 
         if blur_radius and blur_radius > 0:
             img = img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
@@ -66,9 +91,19 @@ def pdf_to_images(
 
         if printer_width is not None and img.width != printer_width:
             new_h = max(1, int(img.height * (printer_width / img.width)))
+            if regions:
+                sx, sy = printer_width / img.width, new_h / img.height
+                regions = [(x0 * sx, y0 * sy, x1 * sx, y1 * sy) for x0, y0, x1, y1 in regions]
             img = img.resize((printer_width, new_h), Image.LANCZOS)
 
-        if binarize:
+        if binarize and dither:
+            if regions is not None:
+                regions = [
+                    (int(x0), int(y0), math.ceil(x1), math.ceil(y1))
+                    for x0, y0, x1, y1 in regions
+                ]
+            img = dither_image(img, dither, threshold, regions=regions)
+        elif binarize:
             img = img.point(lambda p: 0 if p < threshold else 255, mode="1")
             if printer_width is not None and img.width != printer_width:
                 img = img.resize((printer_width, img.height), Image.NEAREST)
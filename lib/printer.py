@@ -1,25 +1,118 @@
-from escpos.printer import Network, Usb
+from __future__ import annotations
+
 import io
 import time
+from typing import TYPE_CHECKING
 from lib.pdftoimg import pdf_to_images
 
+if TYPE_CHECKING:
+    from escpos.printer import Network, Usb
+    from PIL import Image
+
 ESC_INIT = b"\x1b@"
 ESC_FEED_N = lambda n: b"\x1b\x64" + bytes([n])
 ESC_ALIGN_L = b"\x1ba\x00"
 CUT_FULL = b"\x1dV\x00"
 CUT_PARTIAL = b"\x1dV\x01"
+GS_RASTER = b"\x1dv0\x00"
+ESC_FEED_DOTS = lambda n: b"\x1bJ" + bytes([n])
+GS_MOTION_UNITS = lambda x, y: b"\x1dP" + bytes([x, y])
+
+MAX_FEED_DOTS = 255
+RASTER_BAND_HEIGHT = 960
+MIN_BLANK_ROWS = 16
+# ESC J feeds in vertical motion units, which are not always one dot (TM-T88
+# printers default to 1/360 inch on a 180 dpi head). Feeds are only used after
+# GS P pins the unit to the head's dot density.
+FEED_DPI = 203
 
 extra_feed_lines = 5
 
+
+def encode_raster_compact(
+    img: Image.Image,
+    band_height: int = RASTER_BAND_HEIGHT,
+    min_blank_rows: int = MIN_BLANK_ROWS,
+    feed_dpi: int = FEED_DPI,
+) -> tuple[bytes, int]:
+    """
+    Encode a black/white image as GS v 0 raster bands for the wire.
+
+    Runs of at least `min_blank_rows` white rows are sent as ESC J paper feeds
+    instead of zero bytes, and each band is cut off after its right-most black
+    byte column. Returns (data, bytes_saved), where bytes_saved is measured
+    against full-width raster bands of `band_height` rows.
+
+    `feed_dpi` is the printer's vertical dot density; it is sent with GS P so
+    one ESC J unit is one raster row. 0 disables feeds and sends blank rows as
+    raster data.
+    """
+    bits = img.convert("L").point(lambda p: 255 if p < 128 else 0, mode="1")
+    width_bytes = (img.width + 7) // 8
+    raw = bits.tobytes()
+    rows = [raw[i:i + width_bytes] for i in range(0, len(raw), width_bytes)]
+    blank = bytes(width_bytes)
+
+    # Row index where each blank run long enough to be fed instead of sent starts -> its end.
+    blank_runs = {}
+    y = 0
+    while feed_dpi and y < len(rows):
+        if rows[y] == blank:
+            start = y
+            while y < len(rows) and rows[y] == blank:
+                y += 1
+            if y - start >= min_blank_rows:
+                blank_runs[start] = y
+        else:
+            y += 1
+
+    out = bytearray()
+    if blank_runs:
+        out += GS_MOTION_UNITS(feed_dpi, feed_dpi)
+    y = 0
+    while y < len(rows):
+        if y in blank_runs:
+            end = blank_runs[y]
+            dots = end - y
+            while dots > 0:
+                out += ESC_FEED_DOTS(min(dots, MAX_FEED_DOTS))
+                dots -= MAX_FEED_DOTS
+            y = end
+            continue
+
+        start = y
+        while y < len(rows) and y - start < band_height and y not in blank_runs:
+            y += 1
+        band = rows[start:y]
+        band_width = max(1, max(len(row.rstrip(b"\x00")) for row in band))
+        out += GS_RASTER
+        out += band_width.to_bytes(2, "little") + len(band).to_bytes(2, "little")
+        out += b"".join(row[:band_width] for row in band)
+
+    full_size = len(rows) * width_bytes + len(GS_RASTER) + 4
+    full_size += (len(rows) - 1) // band_height * (len(GS_RASTER) + 4)
+    return bytes(out), full_size - len(out)
+
+
 def print_pdf_on_thermal_printer(
-    pdf_path: str,
+    pdf_path: str | bytes,
     zoom: float = 2.0,
     printer_width: int = 576,
     threshold: int = 130,
     feed_lines: int = 1,
     pre_cut_min_lines: int = 6,
     printer: Network | Usb = None,
-) -> None: 
+    dither: str | None = None,
+    dither_images_only: bool = True,
+    feed_dpi: int = FEED_DPI,
+) -> int:
+    """
+    Print a PDF as raster images and cut after each page.
+
+    Returns the number of bytes raster compaction kept off the wire (0 when
+    the printer profile has no raster bit image support and the generic
+    python-escpos image path is used).
+    """
     if printer is None:
         raise ValueError("Printer is required")
 
@@ -33,15 +126,24 @@ def print_pdf_on_thermal_printer(
         blur_radius=0.5,
         contrast=1.3,
         binarize=True,
+        dither=dither,
+        dither_images_only=dither_images_only,
     )
-  
+
+    compact = printer.profile.supports("bitImageRaster")
+    bytes_saved = 0
     for img in images:
         printer._raw(ESC_INIT)
         printer._raw(ESC_ALIGN_L)
 
-        with io.BytesIO() as buf:
-            img.save(buf, format="PNG")
-            printer.image(io.BytesIO(buf.getvalue()))
+        if compact:
+            raster, saved = encode_raster_compact(img, feed_dpi=feed_dpi)
+            printer._raw(raster)
+            bytes_saved += saved
+        else:
+            with io.BytesIO() as buf:
+                img.save(buf, format="PNG")
+                printer.image(io.BytesIO(buf.getvalue()))
 
         pre_cut_lines = max(feed_lines + extra_feed_lines, pre_cut_min_lines + round(extra_feed_lines/2))
         printer._raw(ESC_FEED_N(pre_cut_lines))
@@ -55,4 +157,6 @@ def print_pdf_on_thermal_printer(
                 try:
                     printer._raw(CUT_PARTIAL)
                 except Exception:
-                    pass
\ No newline at end of file
+                    pass
+
+    return bytes_saved
@@ -1,32 +1,70 @@
-from escpos.printer import Network, Usb
-from lib.printer import print_pdf_on_thermal_printer
+from typing import Iterable
+from lib.printer import FEED_DPI, print_pdf_on_thermal_printer
+
+# python-escpos (and with it Pillow and pyusb) is imported inside the functions
+# below so the bridge can start serving before these are loaded.
+
+
+def render_pdf_to_escpos(
+    pdf_path: str | bytes,
+    printer_width: int = 576,
+    zoom: float = 2.0,
+    feed_lines: int = 1,
+    threshold: int = 130,
+    dither: str | None = None,
+    dither_images_only: bool = True,
+    feed_dpi: int = FEED_DPI,
+) -> tuple[bytes, int]:
+    """
+    Render a PDF into the ESC/POS byte stream that would be sent to the printer.
+
+    Returns (data, bytes_saved) where bytes_saved is the raster compaction gain.
+    """
+    from escpos.printer import Dummy
+
+    printer = Dummy()
+    bytes_saved = print_pdf_on_thermal_printer(
+        pdf_path=pdf_path,
+        printer=printer,
+        zoom=zoom,
+        printer_width=printer_width,
+        threshold=threshold,
+        feed_lines=feed_lines,
+        dither=dither,
+        dither_images_only=dither_images_only,
+        feed_dpi=feed_dpi,
+    )
+    return printer.output, bytes_saved
 
 
 def print_pdf_on_thermal_network(
-    pdf_path: str,
+    pdf_path: str | bytes,
     printer_ip: str,
     printer_port: int = 9100,
     printer_width: int = 576,
     zoom: float = 2.0,
     feed_lines: int = 1,
     threshold: int = 130,
-) -> None:
-    printer = Network(printer_ip, printer_port)
-    try:
-        print_pdf_on_thermal_printer(
-            pdf_path=pdf_path,
-            printer=printer,
-            zoom=zoom,
-            printer_width=printer_width,
-            threshold=threshold,
-            feed_lines=feed_lines,
-        )
-    finally:
-        printer.close()
+    dither: str | None = None,
+    dither_images_only: bool = True,
+    feed_dpi: int = FEED_DPI,
+) -> tuple[bytes, int]:
+    data, bytes_saved = render_pdf_to_escpos(
+        pdf_path=pdf_path,
+        zoom=zoom,
+        printer_width=printer_width,
+        threshold=threshold,
+        feed_lines=feed_lines,
+        dither=dither,
+        dither_images_only=dither_images_only,
+        feed_dpi=feed_dpi,
+    )
+    send_escpos_on_network([data], printer_ip, printer_port)
+    return data, bytes_saved
 
 
 def print_pdf_on_thermal_usb(
-    pdf_path: str,
+    pdf_path: str | bytes,
     usb_vendor_id: int,
     usb_product_id: int,
     usb_interface: int = 0,
@@ -34,17 +72,51 @@ def print_pdf_on_thermal_usb(
     zoom: float = 2.0,
     feed_lines: int = 1,
     threshold: int = 160,
+    dither: str | None = None,
+    dither_images_only: bool = True,
+    feed_dpi: int = FEED_DPI,
+) -> tuple[bytes, int]:
+    data, bytes_saved = render_pdf_to_escpos(
+        pdf_path=pdf_path,
+        zoom=zoom,
+        printer_width=printer_width,
+        threshold=threshold,
+        feed_lines=feed_lines,
+        dither=dither,
+        dither_images_only=dither_images_only,
+        feed_dpi=feed_dpi,
+    )
+    send_escpos_on_usb([data], usb_vendor_id, usb_product_id, usb_interface)
+    return data, bytes_saved
+
+
+def send_escpos_on_network(
+    chunks: Iterable[bytes],
+    printer_ip: str,
+    printer_port: int = 9100,
+) -> None:
+    from escpos.printer import Network
+
+    printer = Network(printer_ip, printer_port)
+    try:
+        for chunk in chunks:
+            printer._raw(chunk)
+    finally:
+        printer.close()
+
+
+def send_escpos_on_usb(
+    chunks: Iterable[bytes],
+    usb_vendor_id: int,
+    usb_product_id: int,
+    usb_interface: int = 0,
 ) -> None:
+    from escpos.printer import Usb
+
     printer = Usb(usb_vendor_id, usb_product_id, interface=usb_interface)
     try:
-        print_pdf_on_thermal_printer(
-            pdf_path=pdf_path,
-            printer=printer,
-            zoom=zoom,
-            printer_width=printer_width,
-            threshold=threshold,
-            feed_lines=feed_lines,
-        )
+        for chunk in chunks:
+            printer._raw(chunk)
     finally:
         printer.close()
 
@@ -53,6 +125,8 @@ def verify_connection_espos_on_network(
     printer_ip: str,
     printer_port: int = 9100,
 ) -> bool:
+    from escpos.printer import Network
+
     printer = Network(printer_ip, printer_port)
     try:
         text = f"Verify Success! \n"
@@ -73,6 +147,8 @@ def verify_connection_espos_on_usb(
     usb_product_id: str,
     usb_interface: int = 0,
 ) -> bool:
+    from escpos.printer import Usb
+
     printer = Usb(usb_vendor_id, usb_product_id, interface=usb_interface)
     try:
         text = f"Verify Success! \n"
@@ -0,0 +1,55 @@
+import ssl
+
+from cheroot import wsgi
+from cheroot.ssl.builtin import BuiltinSSLAdapter
+
+
+def make_server(
+    host: str,
+    port: int,
+    app,
+    cert_file: str,
+    key_file: str,
+    workers: int = 16,
+    backlog: int = 64,
+    keepalive_timeout: float = 15.0,
+    max_keepalive: int = 100,
+    max_body_size: int = 0,
+) -> wsgi.Server:
+    """
+    Build the HTTPS server the bridge is served from (cheroot).
+
+    Requests are handled by a fixed pool of `workers` threads. Accepted
+    connections wait in a queue of `backlog` for a free worker; when that is
+    full the client gets a 503 instead of spawning another thread. Idle
+    HTTP/1.1 keep-alive connections are parked outside the pool and closed
+    after `keepalive_timeout` seconds, at most `max_keepalive` of them.
+
+    Call prepare() to bind and listen, then serve() to start handling requests.
+
+    Args:
+        host, port:         address to bind
+        app:                WSGI application
+        cert_file, key_file: PEM certificate and private key
+        workers:            number of request worker threads
+        backlog:            accepted connections allowed to wait for a worker
+        keepalive_timeout:  idle seconds before a connection is closed
+        max_keepalive:      idle keep-alive connections kept open at once
+        max_body_size:      larger request bodies get a 413 (0 = no limit)
+    """
+    server = wsgi.Server(
+        (host, port),
+        app,
+        numthreads=workers,
+        max=workers,
+        request_queue_size=128,
+        timeout=keepalive_timeout,
+        accepted_queue_size=backlog,
+    )
+    server.keep_alive_conn_limit = max_keepalive
+    server.max_request_body_size = max_body_size
+
+    adapter = BuiltinSSLAdapter(cert_file, key_file)
+    adapter.context.minimum_version = ssl.TLSVersion.TLSv1_2
+    server.ssl_adapter = adapter
+    return server
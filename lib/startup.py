@@ -0,0 +1,119 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Modules the print pipeline needs; warm_imports() loads them after the server
+# is listening so the first job does not pay for them.
+HEAVY_MODULES = ["PIL.Image", "fitz", "numpy", "escpos.printer", "usb.core"]
+
+STARTED_AT = time.perf_counter()
+
+
+def _seconds_since_launch() -> Optional[float]:
+    """
+    Seconds since the app was launched, or None where that can not be read.
+
+    A --onefile build counts from when the bootloader created the unpack
+    folder, so the unpack is included; otherwise it counts from the creation
+    of this process.
+    """
+    bundle = getattr(sys, "_MEIPASS", None)
+    if bundle and os.path.basename(bundle).startswith("_MEI"):
+        try:
+            return time.time() - os.stat(bundle).st_birthtime
+        except (AttributeError, OSError):
+            pass
+
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            created, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.GetProcessTimes(
+                kernel32.GetCurrentProcess(),
+                ctypes.byref(created), ctypes.byref(exited),
+                ctypes.byref(kernel), ctypes.byref(user),
+            ):
+                return None
+            # FILETIME counts 100 ns intervals since 1601-01-01.
+            ticks = (created.dwHighDateTime << 32) | created.dwLowDateTime
+            return time.time() - (ticks / 10_000_000 - 11_644_473_600)
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/stat") as f:
+                # Field 22 (starttime, in clock ticks since boot); the command
+                # name before it may contain spaces, so split after its ')'.
+                start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+            return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return None
+
+
+# Time between launch and the first import of this module: interpreter
+# start-up and, for --onefile builds, unpacking the bundle.
+BOOTSTRAP_SECONDS = _seconds_since_launch()
+if BOOTSTRAP_SECONDS is not None:
+    BOOTSTRAP_SECONDS = max(0.0, BOOTSTRAP_SECONDS)
+
+_timings: List[Tuple[str, float, bool]] = []
+_marks: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(label: str, background: bool = False):
+    """Record how long the enclosed block (usually an import) takes."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _timings.append((label, time.perf_counter() - start, background))
+
+
+def mark(label: str) -> None:
+    """Record the time since launch at which a milestone was reached."""
+    with _lock:
+        _marks[label] = time.perf_counter() - STARTED_AT + (BOOTSTRAP_SECONDS or 0.0)
+
+
+def warm_imports(modules: List[str] = HEAVY_MODULES) -> None:
+    for name in modules:
+        try:
+            with timed(name, background=True):
+                importlib.import_module(name)
+        except Exception as e:
+            print(f"[WARN] Could not preload {name}: {e}")
+    mark("modules warmed")
+
+
+def startup_report() -> str:
+    """
+    Format the recorded milestones and per-import times, e.g.
+
+        [INFO] Startup since launch: bootstrap 310 ms, server listening 722 ms, modules warmed 1200 ms
+        [INFO] Startup imports: flask 180.4 ms, ..., fitz 130.2 ms (background)
+
+    Milestones count from process launch; "bootstrap" is the interpreter
+    start-up (and --onefile unpack) before the app's own code ran. Where the
+    launch time can not be read, they count from the first app import and the
+    report says so. Each import only counts what it loaded itself; modules
+    already pulled in by an earlier entry are not timed again.
+    """
+    with _lock:
+        marks = ", ".join(f"{label} {secs * 1000:.0f} ms" for label, secs in _marks.items())
+        imports = ", ".join(
+            f"{label} {secs * 1000:.1f} ms" + (" (background)" if background else "")
+            for label, secs, background in _timings
+        )
+    if BOOTSTRAP_SECONDS is None:
+        header = "[INFO] Startup (excluding interpreter and bundle bootstrap): "
+    else:
+        header = f"[INFO] Startup since launch: bootstrap {BOOTSTRAP_SECONDS * 1000:.0f} ms, "
+    return f"{header}{marks}\n[INFO] Startup imports: {imports}"
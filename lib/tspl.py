@@ -1,5 +1,4 @@
 import time
-import usb.core
 import socket
 
 def build_barcode_tspl(sizeX, sizeY, gapLength, dir, topText, topTextStart, barcodeStart, barcodeData, printCount, barcodeHeight):
@@ -27,6 +26,8 @@ def build_barcode_tspl(sizeX, sizeY, gapLength, dir, topText, topTextStart, barc
     return tspl
 
 def check_printer_usb_connection(vid, pid):
+    import usb.core
+
     dev = usb.core.find(idVendor=vid, idProduct=pid)
     if dev is None:
         raise ValueError("Printer not found")
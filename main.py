@@ -1,15 +1,25 @@
-import logging
+from lib import startup
 import sys
-import tkinter as tk
-from tkinter.scrolledtext import ScrolledText
-from flask import Flask, request, jsonify
-import sqlite3, os, threading, time
-
-from werkzeug.utils import secure_filename
-from lib.printer_interface import print_pdf_on_thermal_network, print_pdf_on_thermal_usb, verify_connection_espos_on_usb, verify_connection_espos_on_network
+import sqlite3, os, threading, time, io, tempfile, hashlib, zlib
 import uuid
-from flask_cors import CORS
+
+# Only what is needed to show the console and accept requests is imported
+# here; PyMuPDF, Pillow, numpy, python-escpos and pyusb are loaded lazily by
+# lib/ and preloaded by startup.warm_imports() once the server is listening.
+with startup.timed("tkinter"):
+    import tkinter as tk
+    from tkinter.scrolledtext import ScrolledText
+with startup.timed("flask"):
+    from flask import Flask, Request, request, jsonify
+    from werkzeug.utils import secure_filename
+with startup.timed("flask_cors"):
+    from flask_cors import CORS
+
+from lib.printer_interface import print_pdf_on_thermal_network, print_pdf_on_thermal_usb, send_escpos_on_network, send_escpos_on_usb, verify_connection_espos_on_usb, verify_connection_espos_on_network
 from lib.tspl import check_printer_usb_connection, check_printer_network_connection, build_barcode_tspl, print_barcode_tspl, print_barcode_tspl_network, print_dummy_tspl 
+with startup.timed("cheroot"):
+    from lib.server import make_server
+from lib.dither import DITHER_MODES, PAGE_DITHER_MODES
     
 DB_PATH = "data/db/data.db"
 PDF_DIR = "data/pdf"
@@ -17,6 +27,39 @@ POS_PDF_JOB_DIR = f"{PDF_DIR}/esc-pos-jobs"
 
 MAX_RETRIES = 3
 
+SSL_CERT_PATH = "certs/cert.pem"
+SSL_KEY_PATH = "certs/key.pem"
+
+HTTP_WORKERS = int(os.environ.get("POS_PRINTER_BRIDGE_WORKERS", 16))
+HTTP_BACKLOG = int(os.environ.get("POS_PRINTER_BRIDGE_BACKLOG", 64))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("POS_PRINTER_BRIDGE_KEEPALIVE_TIMEOUT", 15))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("POS_PRINTER_BRIDGE_MAX_KEEPALIVE", 100))
+MAX_UPLOAD_MB = int(os.environ.get("POS_PRINTER_BRIDGE_MAX_UPLOAD_MB", 20))
+
+# Uploads up to this size are kept in the database instead of the job directory.
+SPOOL_MEMORY_LIMIT = int(os.environ.get("POS_PRINTER_BRIDGE_SPOOL_MEMORY_KB", 512)) * 1024
+SPOOL_GC_INTERVAL = 300
+SPOOL_ORPHAN_GRACE = 600
+FAILED_JOB_TTL_DAYS = int(os.environ.get("POS_PRINTER_BRIDGE_FAILED_JOB_TTL_DAYS", 7))
+
+# How long an Idempotency-Key maps to its job, and the default window for
+# content-hash deduplication (0 disables it unless a request asks for it).
+# Both are capped at MAX_DEDUP_SECONDS so expires_at stays a valid datetime.
+MAX_DEDUP_SECONDS = 30 * 24 * 3600
+IDEMPOTENCY_KEY_TTL = min(max(int(os.environ.get("POS_PRINTER_BRIDGE_IDEMPOTENCY_TTL", 24 * 3600)), 0), MAX_DEDUP_SECONDS)
+DEDUP_WINDOW = min(max(int(os.environ.get("POS_PRINTER_BRIDGE_DEDUP_WINDOW", 0)), 0), MAX_DEDUP_SECONDS)
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# Vertical dot density of the printers; blank raster rows are sent as ESC J
+# feeds in units of 1/FEED_DPI inch (set via GS P). 0 sends them as raster data.
+FEED_DPI = min(max(int(os.environ.get("POS_PRINTER_BRIDGE_FEED_DPI", 203)), 0), 255)
+
+# Completed jobs keep their compressed ESC/POS output for reprints for
+# REPRINT_TTL seconds (0 disables retention), within REPRINT_BUDGET_MB in total.
+REPRINT_TTL = int(os.environ.get("POS_PRINTER_BRIDGE_REPRINT_TTL", 0))
+REPRINT_BUDGET_MB = int(os.environ.get("POS_PRINTER_BRIDGE_REPRINT_BUDGET_MB", 50))
+REPRINT_CHUNK_SIZE = 64 * 1024
+
 if not os.path.exists(DB_PATH):
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
@@ -26,7 +69,24 @@ if not os.path.exists(PDF_DIR):
 if not os.path.exists(POS_PDF_JOB_DIR):
     os.makedirs(POS_PDF_JOB_DIR, exist_ok=True)
 
+class SpoolingRequest(Request):
+    """
+    Keep small uploads in memory and stream large ones straight into the job
+    directory, so persisting a job never copies the file a second time.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= SPOOL_MEMORY_LIMIT:
+            return io.BytesIO()
+        return tempfile.NamedTemporaryFile(
+            dir=POS_PDF_JOB_DIR, prefix="upload-", suffix=".part", delete=False
+        )
+
+
 app = Flask(__name__)
+app.request_class = SpoolingRequest
+# Oversized bodies are rejected with 413 before the upload is read.
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024
 CORS(app)
 
 new_job_event = threading.Event()
@@ -44,6 +104,7 @@ def init_db():
             CREATE TABLE IF NOT EXISTS print_jobs (
               id               INTEGER PRIMARY KEY AUTOINCREMENT,
               file_path        TEXT    NOT NULL,
+              pdf_data         BLOB,
               connection_type  TEXT    NOT NULL CHECK(connection_type IN ('network','usb')),
               printer_ip       TEXT,
               printer_port     INTEGER,
@@ -54,6 +115,9 @@ def init_db():
               threshold        INTEGER DEFAULT 100,
               feed_lines       INTEGER DEFAULT 1,
               zoom             REAL    DEFAULT 2.0,
+              dither           TEXT,
+              dither_images_only INTEGER DEFAULT 1,
+              reprint_of       INTEGER,
               status           TEXT    DEFAULT 'pending',
               retry_count      INTEGER DEFAULT 0,
               last_error       TEXT,
@@ -61,10 +125,92 @@ def init_db():
             );
             """
         )
+        add_missing_columns(
+            conn,
+            "print_jobs",
+            {
+                "pdf_data": "BLOB",
+                "dither": "TEXT",
+                "dither_images_only": "INTEGER DEFAULT 1",
+                "reprint_of": "INTEGER",
+            },
+        )
         conn.execute(
             "CREATE INDEX IF NOT EXISTS idx_status_created ON print_jobs(status, created_at);"
         )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS print_jobs_archive (
+              id               INTEGER PRIMARY KEY,
+              file_path        TEXT,
+              connection_type  TEXT,
+              printer_ip       TEXT,
+              printer_port     INTEGER,
+              usb_vendor_id    INTEGER,
+              usb_product_id   INTEGER,
+              usb_interface    INTEGER,
+              retry_count      INTEGER,
+              last_error       TEXT,
+              created_at       TIMESTAMP,
+              archived_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_submissions (
+              dedup_key   TEXT      PRIMARY KEY,
+              job_id      INTEGER   NOT NULL,
+              expires_at  TIMESTAMP NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_outputs (
+              job_id           INTEGER PRIMARY KEY,
+              connection_type  TEXT    NOT NULL,
+              printer_ip       TEXT,
+              printer_port     INTEGER,
+              usb_vendor_id    INTEGER,
+              usb_product_id   INTEGER,
+              usb_interface    INTEGER,
+              escpos_data      BLOB    NOT NULL,
+              raw_size         INTEGER NOT NULL,
+              stored_size      INTEGER NOT NULL,
+              created_at       TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_job_outputs_created ON job_outputs(created_at);"
+        )
         conn.commit()
+        # Freed pages (PDF blobs, pruned outputs) are returned to the filesystem
+        # by release_free_pages(); switching an existing database needs one VACUUM.
+        if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+            conn.execute("VACUUM;")
+
+
+def release_free_pages(conn):
+    """
+    Truncate the free pages left by deleted rows off the database file.
+    """
+    if conn.execute("PRAGMA freelist_count;").fetchone()[0]:
+        # Through execute() the pragma only steps once and frees a single
+        # page; executescript() runs it to completion.
+        conn.executescript("PRAGMA incremental_vacuum;")
+
+
+def add_missing_columns(conn, table, columns):
+    """
+    Add columns introduced after a database was first created.
+    """
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table});")}
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl};")
 
 @app.route("/verify/status", methods=["GET"])
 def verify_status():
@@ -106,20 +252,45 @@ def verify_espos_connection():
 
 @app.route("/print/eos-pos-pdf", methods=["POST"])
 def queue_print():
+    # A retry carrying a known Idempotency-Key header is answered before the
+    # body is parsed, so its upload is never spooled.
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({"error": "Idempotency key too long"}), 400
+        with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+            job_id = find_submission(conn, f"key:{idempotency_key}")
+        if job_id is not None:
+            return jsonify({"message": "Duplicate print job", "job_id": job_id}), 200
+
     file = request.files.get("file")
     conn_type = request.form.get("connection_type")
     if not file or conn_type not in ("network", "usb"):
         return jsonify({"error": "Missing file or invalid connection_type"}), 400
 
-    filename = secure_filename(file.filename)
-    unique_id = uuid.uuid4().hex
-    save_path = os.path.join(POS_PDF_JOB_DIR, f"{unique_id}_{filename}")
-    file.save(save_path)
+    idempotency_key = idempotency_key or request.form.get("idempotency_key")
+    if idempotency_key and len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        return jsonify({"error": "Idempotency key too long"}), 400
+    try:
+        dedup_window = int(request.form.get("dedup_window", DEDUP_WINDOW))
+    except ValueError:
+        return jsonify({"error": "Invalid dedup_window"}), 400
+    if not 0 <= dedup_window <= MAX_DEDUP_SECONDS:
+        return jsonify({"error": f"dedup_window must be between 0 and {MAX_DEDUP_SECONDS} seconds"}), 400
 
     printer_width = int(request.form.get("printer_width", 576))
     threshold = int(request.form.get("threshold", 100))
     feed_lines = int(request.form.get("feed_lines", 1))
     zoom = float(request.form.get("zoom", 2.0))
+    dither = request.form.get("dither") or None
+    if dither is not None and dither not in DITHER_MODES:
+        return jsonify({"error": f"Invalid dither. Use one of: {', '.join(DITHER_MODES)}"}), 400
+    dither_scope = request.form.get("dither_scope", "images")
+    if dither_scope not in ("images", "page"):
+        return jsonify({"error": "Invalid dither_scope. Use 'images' or 'page'."}), 400
+    dither_images_only = dither_scope == "images"
+    if dither is not None and not dither_images_only and dither not in PAGE_DITHER_MODES:
+        return jsonify({"error": f"dither '{dither}' is not available with dither_scope 'page'. Use one of: {', '.join(PAGE_DITHER_MODES)}"}), 400
     
     host = port = usb_vendor_id = usb_product_id = usb_interface = None
 
@@ -145,19 +316,43 @@ def queue_print():
         except ValueError:
             return jsonify({"error": "Invalid USB IDs or interface"}), 400
 
+    dedup_keys = []
+    if idempotency_key:
+        dedup_keys.append((f"key:{idempotency_key}", IDEMPOTENCY_KEY_TTL))
+    if dedup_window > 0:
+        digest = hashlib.file_digest(file.stream, "sha256")
+        digest.update(repr((
+            conn_type, host, port, usb_vendor_id, usb_product_id, usb_interface,
+            printer_width, threshold, feed_lines, zoom, dither, dither_images_only,
+        )).encode())
+        dedup_keys.append((f"sha256:{digest.hexdigest()}", dedup_window))
+        file.stream.seek(0)
+
     with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
-        conn.execute(
+        # Hold the write lock from lookup to insert so concurrent retries of
+        # the same submission can not both get through.
+        conn.execute("BEGIN IMMEDIATE;")
+        for dedup_key, _ in dedup_keys:
+            job_id = find_submission(conn, dedup_key)
+            if job_id is not None:
+                conn.rollback()
+                return jsonify({"message": "Duplicate print job", "job_id": job_id}), 200
+
+        save_path, pdf_data = spool_upload(file)
+        job_id = conn.execute(
             """
             INSERT INTO print_jobs (
-                file_path,
+                file_path, pdf_data,
                 connection_type,
                 printer_ip, printer_port,
                 usb_vendor_id, usb_product_id, usb_interface,
-                printer_width, threshold, feed_lines, zoom
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?)
+                printer_width, threshold, feed_lines, zoom,
+                dither, dither_images_only
+            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)
             """,
             (
                 save_path,
+                pdf_data,
                 conn_type,
                 host,
                 port,
@@ -168,12 +363,220 @@ def queue_print():
                 threshold,
                 feed_lines,
                 zoom,
+                dither,
+                dither_images_only,
             ),
+        ).lastrowid
+        conn.executemany(
+            "INSERT OR REPLACE INTO job_submissions (dedup_key, job_id, expires_at) VALUES (?, ?, datetime('now', ?))",
+            [(dedup_key, job_id, f"+{ttl} seconds") for dedup_key, ttl in dedup_keys],
         )
         conn.commit()
 
     new_job_event.set()
-    return jsonify({"message": "Print job queued"}), 202
+    return jsonify({"message": "Print job queued", "job_id": job_id}), 202
+
+
+def find_submission(conn, dedup_key):
+    """
+    Return the job ID an unexpired deduplication key points at, or None.
+    """
+    row = conn.execute(
+        "SELECT job_id FROM job_submissions WHERE dedup_key=? AND expires_at > datetime('now')",
+        (dedup_key,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def spool_upload(file):
+    """
+    Persist an upload for the printer worker.
+
+    Returns (file_path, pdf_data): small uploads come back as bytes with an
+    empty path, large ones are moved (not copied) into the job directory.
+    """
+    stream = file.stream
+    if isinstance(stream, io.BytesIO):
+        return "", stream.getvalue()
+
+    filename = secure_filename(file.filename)
+    save_path = os.path.join(POS_PDF_JOB_DIR, f"{uuid.uuid4().hex}_{filename}")
+    stream.close()
+    os.replace(stream.name, save_path)
+    return save_path, None
+
+
+@app.route("/jobs/<int:job_id>/reprint", methods=["POST"])
+def reprint_job(job_id):
+    # Only an empty body means "the original printer"; anything else has to
+    # parse, so a mistyped target is not silently printed at the wrong station.
+    data = request.get_json(force=True, silent=True) if request.get_data() else {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+
+    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        conn.row_factory = sqlite3.Row
+        output = conn.execute(
+            """
+            SELECT connection_type, printer_ip, printer_port,
+                   usb_vendor_id, usb_product_id, usb_interface
+            FROM job_outputs WHERE job_id=? AND created_at > datetime('now', ?)
+            """,
+            (job_id, f"-{REPRINT_TTL} seconds"),
+        ).fetchone()
+        if not output:
+            return jsonify({"error": "No stored output for this job"}), 404
+
+        # Without a connection_type in the body the job goes back to its original printer.
+        if "connection_type" not in data:
+            target = dict(output)
+        else:
+            conn_type = data.get("connection_type")
+            target = {
+                "connection_type": conn_type,
+                "printer_ip": None, "printer_port": None,
+                "usb_vendor_id": None, "usb_product_id": None, "usb_interface": None,
+            }
+            try:
+                if conn_type == "network":
+                    if not data.get("host"):
+                        return jsonify({"error": "Missing host"}), 400
+                    target["printer_ip"] = data["host"]
+                    target["printer_port"] = int(data.get("port", 9100))
+                elif conn_type == "usb":
+                    if not data.get("usb_vendor_id") or not data.get("usb_product_id"):
+                        return jsonify({"error": "Missing USB vendor_id or product_id"}), 400
+                    target["usb_vendor_id"] = int(data["usb_vendor_id"], 16)
+                    target["usb_product_id"] = int(data["usb_product_id"], 16)
+                    target["usb_interface"] = int(data.get("usb_interface", 0))
+                else:
+                    return jsonify({"error": "Invalid connection type. Use 'usb' or 'network'."}), 400
+            except (ValueError, TypeError) as e:
+                return jsonify({"error": f"Invalid data: {e}"}), 400
+
+        # Reprints go through the print queue like any other job, so the
+        # worker stays the only thread that talks to the printers.
+        reprint_id = conn.execute(
+            """
+            INSERT INTO print_jobs (
+                file_path, reprint_of,
+                connection_type,
+                printer_ip, printer_port,
+                usb_vendor_id, usb_product_id, usb_interface
+            ) VALUES ('',?,?,?,?,?,?,?)
+            """,
+            (
+                job_id,
+                target["connection_type"],
+                target["printer_ip"],
+                target["printer_port"],
+                target["usb_vendor_id"],
+                target["usb_product_id"],
+                target["usb_interface"],
+            ),
+        ).lastrowid
+        conn.commit()
+
+    new_job_event.set()
+    return jsonify({"message": "Reprint queued", "job_id": reprint_id, "reprint_of": job_id}), 202
+
+
+def reprint_stored_output(conn, job):
+    """
+    Send the stored output of job["reprint_of"] to the printer of `job`.
+    """
+    output = conn.execute(
+        "SELECT escpos_data FROM job_outputs WHERE job_id=?", (job["reprint_of"],)
+    ).fetchone()
+    if not output:
+        raise RuntimeError(f"Stored output of job {job['reprint_of']} has expired")
+
+    chunks = iter_decompressed(output["escpos_data"])
+    if job["connection_type"] == "network":
+        send_escpos_on_network(chunks, job["printer_ip"], job["printer_port"])
+    else:
+        send_escpos_on_usb(
+            chunks, job["usb_vendor_id"], job["usb_product_id"], job["usb_interface"]
+        )
+
+
+def iter_decompressed(blob):
+    decompressor = zlib.decompressobj()
+    for start in range(0, len(blob), REPRINT_CHUNK_SIZE):
+        chunk = decompressor.decompress(blob[start:start + REPRINT_CHUNK_SIZE])
+        if chunk:
+            yield chunk
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def store_job_output(conn, job, escpos_data):
+    """
+    Keep the compressed ESC/POS output of a completed job for reprints.
+    """
+    compressed = zlib.compress(escpos_data, 6)
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO job_outputs (
+            job_id, connection_type,
+            printer_ip, printer_port,
+            usb_vendor_id, usb_product_id, usb_interface,
+            escpos_data, raw_size, stored_size
+        ) VALUES (?,?,?,?,?,?,?,?,?,?)
+        """,
+        (
+            job["id"],
+            job["connection_type"],
+            job["printer_ip"],
+            job["printer_port"],
+            job["usb_vendor_id"],
+            job["usb_product_id"],
+            job["usb_interface"],
+            compressed,
+            len(escpos_data),
+            len(compressed),
+        ),
+    )
+    prune_job_outputs(conn)
+
+
+def prune_job_outputs(conn):
+    """
+    Drop stored outputs past REPRINT_TTL, then the oldest ones until the rest
+    fit in REPRINT_BUDGET_MB.
+    """
+    conn.execute(
+        "DELETE FROM job_outputs WHERE created_at <= datetime('now', ?)",
+        (f"-{REPRINT_TTL} seconds",),
+    )
+    conn.execute(
+        """
+        DELETE FROM job_outputs WHERE job_id IN (
+            SELECT job_id FROM (
+                SELECT job_id,
+                       SUM(stored_size) OVER (ORDER BY created_at DESC, job_id DESC) AS running
+                  FROM job_outputs
+            ) WHERE running > ?
+        )
+        """,
+        (REPRINT_BUDGET_MB * 1024 * 1024,),
+    )
+
+
+@app.teardown_request
+def discard_spooled_uploads(exc):
+    """
+    Remove upload spool files the request did not turn into a job.
+    """
+    for file in (request.__dict__.get("files") or {}).values():
+        name = getattr(file.stream, "name", None)
+        if isinstance(name, str) and name.endswith(".part") and os.path.exists(name):
+            file.close()
+            try:
+                os.remove(name)
+            except OSError:
+                print(f"[WARN] Could not delete file {name}")
 
 
 
@@ -310,19 +713,30 @@ def printer_worker():
             )
             conn.commit()
             try:
+                if job["reprint_of"] is not None:
+                    reprint_stored_output(conn, job)
+                    conn.execute("DELETE FROM print_jobs WHERE id=?", (job_id,))
+                    conn.commit()
+                    print(f"[INFO] Job {job_id} reprinted output of job {job['reprint_of']}")
+                    continue
+
+                pdf_source = job["pdf_data"] if job["pdf_data"] is not None else job["file_path"]
                 if job["connection_type"] == "network":
-                    print_pdf_on_thermal_network(
-                        pdf_path=job["file_path"],
+                    escpos_data, bytes_saved = print_pdf_on_thermal_network(
+                        pdf_path=pdf_source,
                         printer_ip=job["printer_ip"],
                         printer_port=job["printer_port"],
                         printer_width=job["printer_width"],
                         threshold=job["threshold"],
                         feed_lines=job["feed_lines"],
                         zoom=job["zoom"],
+                        dither=job["dither"],
+                        dither_images_only=bool(job["dither_images_only"]),
+                        feed_dpi=FEED_DPI,
                     )
                 else:
-                    print_pdf_on_thermal_usb(
-                        pdf_path=job["file_path"],
+                    escpos_data, bytes_saved = print_pdf_on_thermal_usb(
+                        pdf_path=pdf_source,
                         usb_vendor_id=job["usb_vendor_id"],
                         usb_product_id=job["usb_product_id"],
                         usb_interface=job["usb_interface"],
@@ -330,15 +744,36 @@ def printer_worker():
                         threshold=job["threshold"],
                         feed_lines=job["feed_lines"],
                         zoom=job["zoom"],
+                        dither=job["dither"],
+                        dither_images_only=bool(job["dither_images_only"]),
+                        feed_dpi=FEED_DPI,
                     )
 
-                try:
-                    os.remove(job["file_path"])
-                except OSError:
-                    print(f"[WARN] Could not delete file {job['file_path']}")
+                print(f"[INFO] Job {job_id} printed: {len(escpos_data)} bytes sent, {bytes_saved} bytes saved by raster compaction")
+
+                if job["file_path"]:
+                    try:
+                        os.remove(job["file_path"])
+                    except OSError:
+                        print(f"[WARN] Could not delete file {job['file_path']}")
                 conn.execute("DELETE FROM print_jobs WHERE id=?", (job_id,))
                 conn.commit()
 
+                if REPRINT_TTL > 0:
+                    # The job is already printed, so a failure here must not
+                    # send it back through the retry path.
+                    try:
+                        store_job_output(conn, job, escpos_data)
+                        conn.commit()
+                    except sqlite3.Error as e:
+                        conn.rollback()
+                        print(f"[WARN] Could not keep output of job {job_id} for reprint: {e}")
+
+                try:
+                    release_free_pages(conn)
+                except sqlite3.Error as e:
+                    print(f"[WARN] Could not release free database pages: {e}")
+
             except Exception as e:
                 err = str(e)
                 conn.execute(
@@ -358,6 +793,81 @@ def printer_worker():
                 time.sleep(2)
 
 
+def collect_spool():
+    """
+    Archive failed jobs older than FAILED_JOB_TTL_DAYS, drop expired
+    deduplication keys and reprint outputs, and delete spool files that no
+    job refers to.
+    """
+    with sqlite3.connect(DB_PATH, check_same_thread=False) as conn:
+        expired = (
+            "status='failed' AND retry_count >= ? AND created_at < datetime('now', ?)",
+            (MAX_RETRIES, f"-{FAILED_JOB_TTL_DAYS} days"),
+        )
+        expired_files = [
+            row[0]
+            for row in conn.execute(f"SELECT file_path FROM print_jobs WHERE {expired[0]}", expired[1])
+        ]
+        conn.execute(
+            f"""
+            INSERT OR REPLACE INTO print_jobs_archive (
+                id, file_path, connection_type,
+                printer_ip, printer_port,
+                usb_vendor_id, usb_product_id, usb_interface,
+                retry_count, last_error, created_at
+            )
+            SELECT
+                id, file_path, connection_type,
+                printer_ip, printer_port,
+                usb_vendor_id, usb_product_id, usb_interface,
+                retry_count, last_error, created_at
+            FROM print_jobs WHERE {expired[0]}
+            """,
+            expired[1],
+        )
+        archived = conn.execute(f"DELETE FROM print_jobs WHERE {expired[0]}", expired[1]).rowcount
+        conn.commit()
+        conn.execute("DELETE FROM job_submissions WHERE expires_at <= datetime('now')")
+        prune_job_outputs(conn)
+        conn.commit()
+        release_free_pages(conn)
+        if archived:
+            print(f"[INFO] Archived {archived} failed print job(s)")
+
+        referenced = {
+            os.path.basename(row[0])
+            for row in conn.execute("SELECT file_path FROM print_jobs WHERE file_path != ''")
+        }
+
+    for path in expired_files:
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # The grace period covers uploads still being written and files moved into
+    # place whose job row is not committed yet.
+    cutoff = time.time() - SPOOL_ORPHAN_GRACE
+    for entry in os.scandir(POS_PDF_JOB_DIR):
+        if not entry.is_file() or entry.name in referenced:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                print(f"[INFO] Removed orphaned spool file {entry.name}")
+        except OSError:
+            pass
+
+
+def spool_collector():
+    while True:
+        try:
+            collect_spool()
+        except Exception as e:
+            print(f"[WARN] Spool collection failed: {e}")
+        time.sleep(SPOOL_GC_INTERVAL)
+
 
 class GuiConsole(tk.Tk):
     def __init__(self):
@@ -390,18 +900,31 @@ class GuiConsole(tk.Tk):
 
     def run_server(self):
         print("Starting POS Printer Bridge server...")
-        logging.getLogger('werkzeug').setLevel(logging.ERROR)
         init_db()
         threading.Thread(target=printer_worker, daemon=True).start()
+        threading.Thread(target=spool_collector, daemon=True).start()
         port = int(os.environ.get("POS_PRINTER_BRIDGE_PORT", 5000))
-        print(f"Server started at https://localhost:{port}")
-        app.run(
-            debug=False,
-            port=port,
-            host="0.0.0.0",
-            threaded=True,
-            ssl_context=("certs/cert.pem", "certs/key.pem")
+        server = make_server(
+            "0.0.0.0",
+            port,
+            app,
+            SSL_CERT_PATH,
+            SSL_KEY_PATH,
+            workers=HTTP_WORKERS,
+            backlog=HTTP_BACKLOG,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            max_keepalive=HTTP_MAX_KEEPALIVE,
+            max_body_size=MAX_UPLOAD_MB * 1024 * 1024,
         )
+        server.prepare()
+        startup.mark("server listening")
+        print(f"Server started at https://localhost:{port} ({HTTP_WORKERS} workers)")
+        threading.Thread(target=self.warm_up, daemon=True).start()
+        server.serve()
+
+    def warm_up(self):
+        startup.warm_imports()
+        print(startup.startup_report())
 
 
 if __name__ == "__main__":